@@ -1,21 +1,48 @@
-from flask import Flask, render_template, request, jsonify
+import os
+import sys
+from flask import Flask, render_template, request, jsonify, g
 from flask_cors import CORS
-from medical import initialize_models, create_medical_rag_chain, initialize_faiss
+from medical import (initialize_models, create_medical_rag_chain, create_model_routing,
+                     initialize_faiss, FAISS_DB_PATH)
+from index_manager import IndexManager, IndexState, is_valid_version
+
+# Shared admin/profiling endpoints live in onehealth_common at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from onehealth_common.admin import admin_bp, admin_required
 
 app = Flask(__name__)
 # Enable CORS for all routes and all origins 
 CORS(app, supports_credentials=True)
 
+app.register_blueprint(admin_bp)
+
+def build_rag_state(version):
+    vectorstore = initialize_faiss(embeddings, version)
+    if vectorstore is None:
+        raise FileNotFoundError(f"FAISS index version {version} not found")
+    # Only the vectorstore-bound chain is rebuilt; the router and its stats are shared
+    chain = create_medical_rag_chain(llm, embeddings, vectorstore, routing=routing)
+    return IndexState(version, vectorstore, chain)
+
 # Initialize the RAG system components
+index_manager = IndexManager(FAISS_DB_PATH, build_rag_state)
+routing = None
 try:
     embeddings, llm = initialize_models()
-    vectorstore = initialize_faiss(embeddings)
-    chain = create_medical_rag_chain(llm, embeddings, vectorstore)
+    routing = create_model_routing(llm)
+    index_manager.load()
+    index_manager.start_watcher()
     print("✅ RAG system initialized successfully")
 except Exception as e:
     print(f"❌ Error initializing RAG system: {e}")
     print("Chat functionality will be disabled.")
-    chain = None
+
+@app.after_request
+def add_index_version(response):
+    version = g.get('index_version') or index_manager.version
+    if version:
+        response.headers['X-Index-Version'] = version
+    return response
 
 @app.route('/')
 def home():
@@ -24,7 +51,7 @@ def home():
 @app.route('/api/healthcare/answer', methods=['POST'])
 def health_answer():
     try:
-        if chain is None:
+        if index_manager.state is None:
             return jsonify({
                 'answer': "Error: RAG system is not initialized. Please check server logs.",
                 'sources': []
@@ -52,8 +79,10 @@ def health_answer():
                 'sources': []
             })
 
-        # Query the medical RAG system
-        response = chain({"query": user_message})
+        # Query the medical RAG system, pinned to one index version for the whole request
+        with index_manager.acquire() as state:
+            g.index_version = state.version
+            response = state.chain({"query": user_message})
         
         answer = response['result']
         sources = [doc.metadata.get('source', 'Medical Database') 
@@ -64,7 +93,10 @@ def health_answer():
         
         return jsonify({
             'answer': answer,
-            'sources': sources
+            'sources': sources,
+            'model': response.get('model'),
+            'routing': response.get('routing'),
+            'index_version': g.index_version
         })
         
     except Exception as e:
@@ -73,6 +105,37 @@ def health_answer():
             'sources': []
         }), 500
 
+@app.route('/api/healthcare/models/stats', methods=['GET'])
+def model_stats():
+    if routing is None:
+        return jsonify({'error': 'Model routing is not enabled'}), 404
+    router, _ = routing
+    return jsonify(router.report())
+
+@app.route('/api/admin/index/reload', methods=['POST'])
+@admin_required
+def reload_index():
+    data = request.get_json(silent=True) or {}
+    version = data.get('version')
+    if version is not None and not is_valid_version(FAISS_DB_PATH, version):
+        return jsonify({'error': f"Unknown index version: {version}"}), 400
+    if data.get('wait'):
+        try:
+            loaded = index_manager.load(version)
+        except Exception as e:
+            return jsonify({'error': str(e), 'index_version': index_manager.version}), 500
+        return jsonify({'status': 'loaded', 'index_version': loaded})
+    index_manager.reload_async(version)
+    return jsonify({'status': 'reloading', 'index_version': index_manager.version}), 202
+
+@app.route('/api/admin/index', methods=['GET'])
+@admin_required
+def index_status():
+    return jsonify({
+        'index_version': index_manager.version,
+        'last_error': index_manager.last_error
+    })
+
 if __name__ == '__main__':
     print("🏥 Starting Medical Chatbot Server...")
     print("✨ Access the chatbot at http://localhost:5010")
@@ -1,5 +1,6 @@
 import json
-from langchain_community.embeddings import HuggingFaceInferenceAPIEmbeddings
+from http_clients import PooledHuggingFaceEmbeddings
+from index_manager import new_version_name, new_version_path, publish_version
 from langchain_community.vectorstores import FAISS
 from tqdm import tqdm
 import os
@@ -112,7 +113,7 @@ def create_faiss_db():
     print("🔧 Creating FAISS database...")
     
     # Initialize embedding model
-    embeddings = HuggingFaceInferenceAPIEmbeddings(
+    embeddings = PooledHuggingFaceEmbeddings(
         api_key=HF_API_KEY,
         model_name=DEFAULT_EMBEDDING_MODEL
     )
@@ -127,9 +128,12 @@ def create_faiss_db():
         metadatas=metadatas
     )
     
-    # Save the vector store
-    vectorstore.save_local(FAISS_DB_PATH)
-    print(f"✅ FAISS database created and saved to {FAISS_DB_PATH}")
+    # Save the vector store as a new version, then make it the live one.
+    # Running servers pick it up via the reload endpoint or the index watcher.
+    version = new_version_name()
+    vectorstore.save_local(new_version_path(FAISS_DB_PATH, version))
+    publish_version(FAISS_DB_PATH, version)
+    print(f"✅ FAISS database version {version} created and saved to {FAISS_DB_PATH}")
 
 if __name__ == "__main__":
     print("🏥 Medical Knowledge Base Creation")
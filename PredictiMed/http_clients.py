@@ -0,0 +1,241 @@
+import os
+import random
+import threading
+import time
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+from langchain_core.embeddings import Embeddings
+import dotenv
+
+dotenv.load_dotenv()
+
+# Connection pool / retry configuration (overridable through the environment)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "4.0"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+# Seconds to wait before sending a duplicate (hedged) request; 0 disables hedging
+HTTP_HEDGE_AFTER = float(os.getenv("HTTP_HEDGE_AFTER", "0"))
+
+# Query embedding micro-batching
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "10"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+# Upper bound on how long embed_query waits for its batch, retries included
+EMBED_QUERY_TIMEOUT = float(os.getenv(
+    "EMBED_QUERY_TIMEOUT",
+    str((HTTP_CONNECT_TIMEOUT + HTTP_READ_TIMEOUT) * (HTTP_MAX_RETRIES + 1) + HTTP_BACKOFF_MAX * HTTP_MAX_RETRIES)
+))
+
+# Endpoint overrides, e.g. to point at a local stand-in server
+HF_API_URL = os.getenv("HF_API_URL")
+GROQ_API_BASE = os.getenv("GROQ_API_BASE")
+
+RETRY_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class RetryableHTTPError(Exception):
+    """Raised for responses that are worth retrying (rate limits, 5xx)."""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code} from {response.url}")
+        self.response = response
+
+
+def backoff_delay(attempt, base=HTTP_BACKOFF_BASE, cap=HTTP_BACKOFF_MAX):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class PooledHTTPClient:
+    """Keep-alive requests session with per-call timeouts, retries and hedging."""
+
+    def __init__(self,
+                 pool_size=HTTP_POOL_SIZE,
+                 timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                 max_retries=HTTP_MAX_RETRIES,
+                 hedge_after=HTTP_HEDGE_AFTER,
+                 headers=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after
+
+        self.session = requests.Session()
+        # Retries are handled in post_json so they can be jittered and hedged
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size,
+                              max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+        if headers:
+            self.session.headers.update(headers)
+
+        self._hedge_pool = None
+        if hedge_after and hedge_after > 0:
+            self._hedge_pool = ThreadPoolExecutor(max_workers=pool_size,
+                                                  thread_name_prefix="http-hedge")
+
+    def _post_once(self, url, payload, timeout):
+        response = self.session.post(url, json=payload, timeout=timeout)
+        if response.status_code in RETRY_STATUS_CODES:
+            raise RetryableHTTPError(response)
+        response.raise_for_status()
+        return response.json()
+
+    def _post_hedged(self, url, payload, timeout):
+        primary = self._hedge_pool.submit(self._post_once, url, payload, timeout)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        # Primary is slow: race it against a duplicate and keep the first success
+        pending = {primary, self._hedge_pool.submit(self._post_once, url, payload, timeout)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def post_json(self, url, payload, timeout=None):
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            try:
+                if self._hedge_pool is not None:
+                    return self._post_hedged(url, payload, timeout)
+                return self._post_once(url, payload, timeout)
+            except (requests.ConnectionError, requests.Timeout, RetryableHTTPError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                retry_after = getattr(getattr(e, "response", None), "headers", {}).get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, min(float(retry_after), HTTP_BACKOFF_MAX))
+                print(f"⚠️ Request to {url} failed ({e}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def close(self):
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+        self.session.close()
+
+
+class EmbeddingMicroBatcher:
+    """Merges concurrent single-text embedding calls into one batched call.
+
+    Callers block on ``embed(text)`` while a background thread collects every
+    request that arrives within ``window_ms`` (up to ``max_batch`` texts).
+    Each collected batch is sent to ``embed_fn`` on a pool of
+    ``max_concurrency`` workers, so a slow batch doesn't hold up the next.
+    """
+
+    def __init__(self, embed_fn, window_ms=EMBED_BATCH_WINDOW_MS, max_batch=EMBED_MAX_BATCH,
+                 max_concurrency=HTTP_POOL_SIZE, timeout=EMBED_QUERY_TIMEOUT):
+        self.embed_fn = embed_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="embed-batch")
+        self._worker = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._worker.start()
+
+    def embed(self, text):
+        future = Future()
+        self._queue.put((text, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Query embedding did not complete within {self.timeout}s")
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            self._pool.submit(self._embed_batch, self._collect())
+
+    def _embed_batch(self, batch):
+        # Callers that already timed out have cancelled their futures
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = [text for text, _ in batch]
+        try:
+            vectors = self.embed_fn(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+
+class PooledHuggingFaceEmbeddings(Embeddings):
+    """Drop-in replacement for HuggingFaceInferenceAPIEmbeddings using a pooled client."""
+
+    def __init__(self, api_key, model_name, api_url=HF_API_URL, client=None,
+                 batch_window_ms=EMBED_BATCH_WINDOW_MS, max_batch=EMBED_MAX_BATCH):
+        self.model_name = model_name
+        self.api_url = api_url or (
+            "https://api-inference.huggingface.co/pipeline/feature-extraction/" + model_name
+        )
+        self.max_batch = max_batch
+        self.client = client or PooledHTTPClient(
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else None
+        )
+        self.batcher = EmbeddingMicroBatcher(self._embed_batch, batch_window_ms, max_batch,
+                                             max_concurrency=HTTP_POOL_SIZE)
+
+    def _embed_batch(self, texts):
+        result = self.client.post_json(self.api_url, {
+            "inputs": texts,
+            "options": {"wait_for_model": True, "use_cache": True}
+        })
+        if isinstance(result, dict) and "error" in result:
+            raise RuntimeError(f"Embedding API error: {result['error']}")
+        return result
+
+    def embed_documents(self, texts):
+        embeddings = []
+        for start in range(0, len(texts), self.max_batch):
+            embeddings.extend(self._embed_batch(texts[start:start + self.max_batch]))
+        return embeddings
+
+    def embed_query(self, text):
+        return self.batcher.embed(text)
+
+
+def build_groq_http_client(pool_size=HTTP_POOL_SIZE):
+    """Shared keep-alive httpx client for ChatGroq."""
+    import httpx
+
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=pool_size,
+                            max_keepalive_connections=pool_size,
+                            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY),
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    )
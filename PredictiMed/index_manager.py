@@ -0,0 +1,214 @@
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Versioned index layout:
+#   medical_faiss_db/CURRENT              -> name of the live version
+#   medical_faiss_db/versions/<version>/  -> index.faiss + index.pkl
+# A flat medical_faiss_db/index.faiss (the original layout) is served as LEGACY_VERSION.
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+LEGACY_VERSION = "legacy"
+INDEX_KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "3"))
+# Seconds between checks of CURRENT for a new version; 0 disables the watcher
+INDEX_WATCH_INTERVAL = float(os.getenv("INDEX_WATCH_INTERVAL", "0"))
+# Seconds to wait for in-flight requests on an old index before releasing it anyway
+INDEX_DRAIN_TIMEOUT = float(os.getenv("INDEX_DRAIN_TIMEOUT", "60"))
+
+
+def new_version_name():
+    return datetime.now().strftime("v%Y%m%d-%H%M%S")
+
+
+def is_valid_version(db_path, version):
+    """True only for ``legacy`` (with a flat index) or an existing entry of versions/."""
+    if not isinstance(version, str) or not version:
+        return False
+    if version == LEGACY_VERSION:
+        return os.path.exists(os.path.join(db_path, "index.faiss"))
+    versions_root = os.path.join(db_path, VERSIONS_DIR)
+    # Compare against the directory listing so names like "../x" can never match
+    try:
+        return version in os.listdir(versions_root) and os.path.isdir(os.path.join(versions_root, version))
+    except FileNotFoundError:
+        return False
+
+
+def new_version_path(db_path, version):
+    """Directory to save a new ``version`` into; it does not need to exist yet."""
+    if not version or os.path.basename(version) != version or version in (".", ".."):
+        raise ValueError(f"Invalid index version name: {version!r}")
+    return os.path.join(db_path, VERSIONS_DIR, version)
+
+
+def version_path(db_path, version):
+    """Directory of an existing ``version`` to load from; rejects anything else."""
+    if not is_valid_version(db_path, version):
+        raise ValueError(f"Unknown index version: {version!r}")
+    if version == LEGACY_VERSION:
+        return db_path
+    return new_version_path(db_path, version)
+
+
+def current_version(db_path):
+    """Version named in CURRENT, or LEGACY_VERSION for a flat index, or None."""
+    try:
+        with open(os.path.join(db_path, CURRENT_FILE)) as f:
+            version = f.read().strip()
+        if is_valid_version(db_path, version):
+            return version
+    except FileNotFoundError:
+        pass
+    if os.path.exists(os.path.join(db_path, "index.faiss")):
+        return LEGACY_VERSION
+    return None
+
+
+def publish_version(db_path, version, keep=INDEX_KEEP_VERSIONS):
+    """Atomically point CURRENT at ``version`` and prune old versions."""
+    tmp_path = os.path.join(db_path, CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(db_path, CURRENT_FILE))
+
+    versions_root = os.path.join(db_path, VERSIONS_DIR)
+    versions = sorted(v for v in os.listdir(versions_root) if v != version)
+    for old in versions[:max(0, len(versions) - (keep - 1))]:
+        shutil.rmtree(os.path.join(versions_root, old), ignore_errors=True)
+
+
+class IndexState:
+    """One loaded index version plus everything derived from it."""
+
+    def __init__(self, version, vectorstore, chain):
+        self.version = version
+        self.vectorstore = vectorstore
+        self.chain = chain
+        self.in_flight = 0
+        self.retired = False
+        self.drained = threading.Condition()
+
+
+class IndexManager:
+    """Serves requests from the live IndexState and hot-swaps in new versions.
+
+    ``build_state(version)`` must return an IndexState for the given version.
+    Reloads build the new state in a background thread, swap it in with a
+    single reference assignment, then wait for requests still holding the old
+    state to finish before dropping it.
+    """
+
+    def __init__(self, db_path, build_state):
+        self.db_path = db_path
+        self.build_state = build_state
+        self.state = None
+        self.last_error = None
+        self._failed_version = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+
+    @property
+    def version(self):
+        state = self.state
+        return state.version if state else None
+
+    @contextmanager
+    def acquire(self):
+        while True:
+            state = self.state
+            if state is None:
+                raise RuntimeError("No FAISS index is loaded")
+            with state.drained:
+                # A swap may have retired this state between the read and the lock
+                if not state.retired:
+                    state.in_flight += 1
+                    break
+        try:
+            yield state
+        finally:
+            with state.drained:
+                state.in_flight -= 1
+                if state.in_flight == 0:
+                    state.drained.notify_all()
+
+    def load(self, version=None):
+        """Build and swap in ``version`` (default: CURRENT). Blocks until swapped."""
+        with self._reload_lock:
+            version = version or current_version(self.db_path)
+            if version is None:
+                raise FileNotFoundError(f"No FAISS index found in {self.db_path}")
+            if not is_valid_version(self.db_path, version):
+                raise ValueError(f"Unknown index version: {version!r}")
+            if self.state is not None and self.state.version == version:
+                return version
+
+            print(f"📚 Loading FAISS index version {version}...")
+            start = time.perf_counter()
+            try:
+                new_state = self.build_state(version)
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                self._failed_version = version
+                raise
+            self.last_error = None
+            self._failed_version = None
+
+            old_state, self.state = self.state, new_state
+            print(f"✅ Serving FAISS index version {version} (loaded in {time.perf_counter() - start:.1f}s)")
+
+        if old_state is not None:
+            self._drain(old_state)
+        return version
+
+    def reload_async(self, version=None):
+        """Start a background reload; returns the thread running it."""
+        def run():
+            try:
+                self.load(version)
+            except Exception as e:
+                print(f"❌ Index reload failed: {e}")
+
+        thread = threading.Thread(target=run, name="index-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def _drain(self, state):
+        with state.drained:
+            state.drained.wait_for(lambda: state.in_flight == 0, timeout=INDEX_DRAIN_TIMEOUT)
+            state.retired = True
+            remaining = state.in_flight
+        if remaining:
+            # Stragglers keep their own references; only the manager lets go here
+            print(f"⚠️ Retired index version {state.version} with {remaining} requests still in flight")
+            return
+        print(f"🧹 Drained index version {state.version}")
+        state.vectorstore = None
+        state.chain = None
+
+    def start_watcher(self, interval=INDEX_WATCH_INTERVAL):
+        """Poll CURRENT and reload whenever it names a different version."""
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                version = current_version(self.db_path)
+                if (version and version != self.version and version != self._failed_version
+                        and not self._reload_lock.locked()):
+                    try:
+                        self.load(version)
+                    except Exception as e:
+                        print(f"❌ Index reload failed: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="index-watcher", daemon=True)
+        self._watcher.start()
@@ -1,12 +1,17 @@
 import os
+import groq
 from langchain_groq import ChatGroq
-from langchain_community.embeddings import HuggingFaceInferenceAPIEmbeddings
 from langchain.prompts import PromptTemplate
 from langchain.chains import RetrievalQA
+from langchain.chains.question_answering import load_qa_chain
 from langchain_community.vectorstores import FAISS
 import json
 from tqdm import tqdm
 import dotenv
+from http_clients import (PooledHuggingFaceEmbeddings, build_groq_http_client,
+                          GROQ_API_BASE, HTTP_MAX_RETRIES, HTTP_READ_TIMEOUT)
+from model_router import ModelRouter, RoutedMedicalChain
+from index_manager import current_version, version_path
 
 dotenv.load_dotenv()
 
@@ -72,17 +77,18 @@ Note: While I provide medical information, it's essential to consult healthcare
 
 print("🚀 Initializing Medical RAG System...")
 
-def initialize_faiss(embeddings=None):
+def initialize_faiss(embeddings=None, version=None):
     print("📚 Initializing FAISS...")
-    if os.path.exists(FAISS_DB_PATH):
+    version = version or current_version(FAISS_DB_PATH)
+    if version is not None:
         if embeddings is None:
             # Initialize default embeddings if none provided
-            embeddings = HuggingFaceInferenceAPIEmbeddings(
+            embeddings = PooledHuggingFaceEmbeddings(
                 api_key=HF_API_KEY,
                 model_name=DEFAULT_EMBEDDING_MODEL
             )
         return FAISS.load_local(
-            FAISS_DB_PATH, 
+            version_path(FAISS_DB_PATH, version), 
             embeddings,
             allow_dangerous_deserialization=True  # Required for loading local FAISS database
         )
@@ -95,22 +101,44 @@ def initialize_models(llm_model=DEFAULT_LLM_MODEL,
                      temperature=0.7):
     print("🧠 Loading models...")
     
-    # Initialize embedding model
-    embeddings = HuggingFaceInferenceAPIEmbeddings(
+    # Initialize embedding model (pooled keep-alive client, batched queries)
+    embeddings = PooledHuggingFaceEmbeddings(
         api_key=HF_API_KEY,
         model_name=embd_model
     )
     
     # Initialize LLM
-    llm = ChatGroq(
+    llm = create_llm(llm_model, temperature)
+    
+    return embeddings, llm
+
+_groq_http_client = None
+
+def create_llm(llm_model=DEFAULT_LLM_MODEL, temperature=0.7):
+    global _groq_http_client
+    # All Groq models share one keep-alive connection pool
+    if _groq_http_client is None:
+        _groq_http_client = build_groq_http_client()
+    # Build the sync client ourselves: ChatGroq passes a single http_client to
+    # both its sync and async clients, and groq.AsyncGroq rejects an httpx.Client
+    client = groq.Groq(
+        api_key=GROQ_API_KEY,
+        base_url=GROQ_API_BASE,
+        timeout=HTTP_READ_TIMEOUT,
+        max_retries=HTTP_MAX_RETRIES,
+        http_client=_groq_http_client
+    ).chat.completions
+    return ChatGroq(
+        client=client,
         groq_api_key=GROQ_API_KEY,
+        groq_api_base=GROQ_API_BASE,
         model_name=llm_model,
-        temperature=temperature
+        temperature=temperature,
+        request_timeout=HTTP_READ_TIMEOUT,
+        max_retries=HTTP_MAX_RETRIES
     )
-    
-    return embeddings, llm
 
-def create_medical_rag_chain(llm, embeddings, vectorstore):
+def create_medical_prompt():
     # Create medical-specific prompt template
     prompt_template = """
     {system_prompt}
@@ -135,6 +163,28 @@ def create_medical_rag_chain(llm, embeddings, vectorstore):
         partial_variables={"system_prompt": SYSTEM_PROMPT}
     )
     
+    return PROMPT
+
+def create_model_routing(llm):
+    """Router and per-model QA chains. Neither depends on the index, so build them once."""
+    PROMPT = create_medical_prompt()
+    # One LLM per available model; the given llm is used for its own model
+    llms = {model: create_llm(model, llm.temperature) for model in LLM_OPTIONS
+            if model != llm.model_name}
+    llms[llm.model_name] = llm
+    qa_chains = {model: load_qa_chain(model_llm, chain_type="stuff", prompt=PROMPT)
+                 for model, model_llm in llms.items()}
+    router = ModelRouter(llms.keys(), strong_model=llm.model_name)
+    return router, qa_chains
+
+def create_medical_rag_chain(llm, embeddings, vectorstore, routed=True, routing=None):
+    if routed:
+        # Reuse an existing (router, qa_chains) pair so stats survive index reloads
+        router, qa_chains = routing or create_model_routing(llm)
+        return RoutedMedicalChain(router, qa_chains, vectorstore, k=3)
+
+    PROMPT = create_medical_prompt()
+
     # Create retrieval chain
     chain = RetrievalQA.from_chain_type(
         llm=llm,
@@ -159,6 +209,8 @@ def query_medical_rag(question, chain):
         sources = response['source_documents']
         
         print(f"📚 Found {len(sources)} relevant medical documents")
+        if 'model' in response:
+            print(f"🧭 Answered by {response['model']} ({response['routing']['reason']})")
         
         return answer, sources
         
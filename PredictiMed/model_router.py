@@ -0,0 +1,305 @@
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Routing configuration
+FAST_LLM_MODEL = os.getenv("FAST_LLM_MODEL", "llama3-8b-8192")
+STRONG_LLM_MODEL = os.getenv("STRONG_LLM_MODEL", "llama3-70b-8192")
+# Seconds a model may take before the cascade moves on to a faster one
+LLM_LATENCY_SLO = float(os.getenv("LLM_LATENCY_SLO", "8"))
+# Questions at or below this many words are candidates for the fast model
+SIMPLE_QUESTION_MAX_WORDS = int(os.getenv("SIMPLE_QUESTION_MAX_WORDS", "12"))
+# Top retrieval relevance (0-1) above which the context is considered a clear match
+CONFIDENT_RETRIEVAL_SCORE = float(os.getenv("CONFIDENT_RETRIEVAL_SCORE", "0.6"))
+# Models whose recent p95 exceeds the SLO are skipped once this many samples exist
+MIN_LATENCY_SAMPLES = int(os.getenv("MIN_LATENCY_SAMPLES", "20"))
+# Calls left running after missing the SLO; beyond this the cascade stops abandoning
+# calls and waits for the current model instead of adding fallback load
+MAX_ABANDONED_LLM_CALLS = int(os.getenv("MAX_ABANDONED_LLM_CALLS", "8"))
+
+# Faster models to fall back to, in order, when a model errors or misses the SLO.
+# The fast model has nothing faster below it: its fallback is for availability only,
+# so it is tried when the fast model errors, never because it ran over the SLO.
+FALLBACK_MODELS = {
+    "llama3-70b-8192": ["mixtral-8x7b-32768", "llama3-8b-8192"],
+    "mixtral-8x7b-32768": ["llama3-8b-8192"],
+    "gemma-7b-it": ["llama3-8b-8192"],
+    "llama3-8b-8192": ["gemma-7b-it"],
+}
+
+DEFINITIONAL_PATTERN = re.compile(
+    r"^\s*(what\s+(is|are|does)|define|meaning\s+of|what's|who\s+is)\b", re.IGNORECASE
+)
+COMPLEX_PATTERN = re.compile(
+    r"\b(interact\w*|compar\w*|versus|vs\.?|differen\w*|combined|"
+    r"while\s+(taking|having|on)|history\s+of|pregnan\w*|contraindicat\w*|"
+    r"complication\w*|differential)\b",
+    re.IGNORECASE,
+)
+# Connectors that join separate conditions, e.g. "diabetes and hypertension",
+# "asthma in a patient with heart failure". Bare "with" and commas are left out:
+# "exercise with asthma" or "diabetes, briefly" name a single condition.
+CONDITION_SEPARATOR = re.compile(
+    r";|\b(?:and\s+also|and|or|plus|along\s+with|as\s+well\s+as|"
+    r"in\s+(?:a\s+|an\s+)?(?:patient|person|child|adult|someone|people)s?\s+(?:with|who\s+has))\b",
+    re.IGNORECASE,
+)
+WORD_PATTERN = re.compile(r"[a-z][a-z'-]*", re.IGNORECASE)
+STOPWORDS = {
+    "a", "an", "the", "of", "for", "to", "in", "on", "at", "by", "is", "are", "was", "be",
+    "what", "whats", "what's", "which", "who", "how", "why", "when", "does", "do", "can",
+    "i", "my", "me", "you", "it", "its", "this", "that", "these", "those", "also", "both",
+    "some", "any", "other", "about", "from", "there", "have", "has", "having", "with",
+    "should", "will", "would", "could", "get", "if", "or", "and", "not", "no",
+}
+# Words that appear around a condition without naming one
+GENERIC_WORDS = {
+    "treatment", "treatments", "treat", "treated", "treating", "cure", "cured", "therapy",
+    "symptom", "symptoms", "sign", "signs", "cause", "causes", "caused", "causing",
+    "diagnosis", "diagnose", "diagnosed", "test", "tests", "risk", "risks", "prevent",
+    "prevention", "prevented", "manage", "management", "managed", "medication", "medications",
+    "medicine", "medicines", "drug", "drugs", "dose", "dosage", "side", "effect", "effects",
+    "patient", "patients", "person", "people", "child", "children", "adult", "adults",
+    "someone", "doctor", "exercise", "diet", "eat", "food", "foods", "help", "helps",
+    "long", "last", "normal", "common", "best", "good", "bad", "safe", "serious", "mean",
+    "means", "meaning", "explain", "tell", "know", "need", "take", "taking", "work", "works",
+    "briefly", "simply", "quickly", "please", "really", "much", "many", "often", "early",
+    "type", "types", "kind", "kinds", "stage", "stages", "level", "levels",
+}
+
+
+def count_conditions(question):
+    """Number of connected segments that name a condition, e.g. 2 for "diabetes and hypertension".
+
+    A segment counts when it has a word that is neither a stopword nor a generic
+    word like "treatment" or "patient"; this is a lexical heuristic, not NER.
+    """
+    segments = CONDITION_SEPARATOR.split(question)
+    return sum(
+        1 for segment in segments
+        if any(word.lower() not in STOPWORDS and word.lower() not in GENERIC_WORDS
+               for word in WORD_PATTERN.findall(segment))
+    )
+
+
+def question_features(question):
+    """Cheap lexical features used for routing."""
+    words = question.split()
+    return {
+        "words": len(words),
+        "definitional": bool(DEFINITIONAL_PATTERN.search(question)),
+        "complex_markers": len(COMPLEX_PATTERN.findall(question)),
+        "conditions": count_conditions(question),
+        "questions": max(1, question.count("?")),
+    }
+
+
+class ModelStats:
+    """Rolling latency and outcome counters for one model."""
+
+    def __init__(self, window=200):
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.slo_misses = 0
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "slo_misses": self.slo_misses,
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95),
+        }
+
+
+class ModelRouter:
+    """Chooses an LLM per question and cascades to faster models on SLO misses or errors."""
+
+    def __init__(self, models, fast_model=FAST_LLM_MODEL, strong_model=STRONG_LLM_MODEL,
+                 latency_slo=LLM_LATENCY_SLO, fallbacks=FALLBACK_MODELS,
+                 max_abandoned=MAX_ABANDONED_LLM_CALLS):
+        self.models = list(models)
+        self.strong_model = strong_model if strong_model in self.models else self.models[0]
+        self.fast_model = fast_model if fast_model in self.models else self.strong_model
+        self.latency_slo = latency_slo
+        self.fallbacks = fallbacks
+        self.stats = {model: ModelStats() for model in self.models}
+        self.decisions = Counter()
+        self._lock = threading.Lock()
+        self._abandon_slots = threading.BoundedSemaphore(max_abandoned)
+
+    def route(self, question, relevance_scores):
+        """Return (model, reason) for a question given its retrieval scores."""
+        features = question_features(question)
+        top_score = max(relevance_scores) if relevance_scores else 0.0
+
+        # Multi-condition questions go to the strong model before any fast-path rule
+        if features["conditions"] >= 2:
+            return self.strong_model, "multi_condition"
+        if features["complex_markers"] or features["questions"] > 1:
+            return self.strong_model, "complex"
+        if features["definitional"] and top_score >= CONFIDENT_RETRIEVAL_SCORE:
+            return self.fast_model, "definitional"
+        if features["words"] <= SIMPLE_QUESTION_MAX_WORDS and top_score >= CONFIDENT_RETRIEVAL_SCORE:
+            return self.fast_model, "short"
+        return self.strong_model, "default"
+
+    def cascade(self, model):
+        """Primary model followed by its fallbacks, skipping models running over SLO.
+
+        Fallbacks of the fast model are only used when it errors (see FALLBACK_MODELS).
+        """
+        order = [model] + [m for m in self.fallbacks.get(model, []) if m in self.models and m != model]
+        healthy = [m for m in order if not self._over_slo(m)]
+        return healthy or order
+
+    def _over_slo(self, model):
+        stats = self.stats[model]
+        if len(stats.latencies) < MIN_LATENCY_SAMPLES:
+            return False
+        return stats.percentile(95) > self.latency_slo
+
+    def _record(self, model, latency=None, error=False):
+        with self._lock:
+            stats = self.stats[model]
+            stats.calls += 1
+            if latency is not None:
+                stats.latencies.append(latency)
+            if error:
+                stats.errors += 1
+
+    def _timed_call(self, model, fn):
+        start = time.perf_counter()
+        try:
+            result = fn(model)
+        except Exception:
+            self._record(model, error=True)
+            raise
+        self._record(model, latency=time.perf_counter() - start)
+        return result
+
+    def _start_call(self, model, fn):
+        """Run a call on its own thread so the SLO clock starts when the call does."""
+        future = Future()
+
+        def target():
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(self._timed_call(model, fn))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=target, name=f"llm-{model}", daemon=True).start()
+        return future
+
+    def _abandon(self, future):
+        # The slot is held until the abandoned call finishes (bounded by the client timeout)
+        future.add_done_callback(lambda f: self._abandon_slots.release())
+
+    def run(self, question, relevance_scores, fn):
+        """Call ``fn(model)`` through the cascade; returns (result, model, routing info)."""
+        primary, reason = self.route(question, relevance_scores)
+        order = self.cascade(primary)
+        with self._lock:
+            self.decisions[f"{primary}:{reason}"] += 1
+
+        attempts = []
+        last_error = None
+        for i, model in enumerate(order):
+            # The SLO only pays off when a faster model is next. The last resort and
+            # the fast model (whose fallback is availability-only) run to completion.
+            slo_applies = i < len(order) - 1 and model != self.fast_model
+            try:
+                if not slo_applies or not self._abandon_slots.acquire(blocking=False):
+                    # No SLO here, or too many calls already abandoned: run in this thread
+                    result = self._timed_call(model, fn)
+                else:
+                    future = self._start_call(model, fn)
+                    try:
+                        result = future.result(timeout=self.latency_slo)
+                    except FutureTimeoutError:
+                        self._abandon(future)
+                        raise
+                    except Exception:
+                        self._abandon_slots.release()
+                        raise
+                    self._abandon_slots.release()
+            except FutureTimeoutError:
+                with self._lock:
+                    self.stats[model].slo_misses += 1
+                attempts.append({"model": model, "status": "slo_exceeded"})
+                print(f"⚠️ {model} exceeded {self.latency_slo}s SLO, falling back")
+                continue
+            except Exception as e:
+                last_error = e
+                attempts.append({"model": model, "status": "error"})
+                print(f"⚠️ {model} failed ({e}), falling back")
+                continue
+
+            attempts.append({"model": model, "status": "ok"})
+            if model != primary:
+                with self._lock:
+                    self.decisions[f"fallback:{primary}->{model}"] += 1
+            return result, model, {"primary": primary, "reason": reason, "attempts": attempts}
+        raise last_error or RuntimeError("No model produced an answer")
+
+    def report(self):
+        with self._lock:
+            return {
+                "latency_slo_seconds": self.latency_slo,
+                "models": {model: stats.snapshot() for model, stats in self.stats.items()},
+                "routing_decisions": dict(self.decisions),
+            }
+
+
+class RoutedMedicalChain:
+    """Retrieves once, then answers with the model chosen by a ModelRouter.
+
+    Called like the RetrievalQA chain it replaces: ``chain({"query": q})``
+    returns ``result`` and ``source_documents`` plus ``model`` and ``routing``.
+    """
+
+    def __init__(self, router, qa_chains, vectorstore, k=3):
+        self.router = router
+        self.qa_chains = qa_chains
+        self.vectorstore = vectorstore
+        self.k = k
+
+    def __call__(self, inputs):
+        question = inputs["query"]
+        scored = self.vectorstore.similarity_search_with_relevance_scores(question, k=self.k)
+        documents = [doc for doc, _ in scored]
+        # FAISS returns numpy floats, which jsonify can't serialize
+        scores = [float(score) for _, score in scored]
+
+        def answer(model):
+            qa_chain = self.qa_chains[model]
+            return qa_chain({"input_documents": documents, "question": question})["output_text"]
+
+        result, model, routing = self.router.run(question, scores, answer)
+        routing["retrieval_scores"] = scores
+        return {
+            "query": question,
+            "result": result,
+            "source_documents": documents,
+            "model": model,
+            "routing": routing,
+        }
+
+    def invoke(self, inputs):
+        return self(inputs)
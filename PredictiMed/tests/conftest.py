@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+# The service modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StandInServer:
+    """Local stand-in for the HF inference API.
+
+    ``behaviour(call_index, inputs)`` returns ``(status, delay_seconds)``; a
+    200 response embeds each input as ``[len(text)]``.
+    """
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    index = len(server.batches)
+                    server.batches.append(body["inputs"])
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                status, delay = server.behaviour(index, body["inputs"])
+                time.sleep(delay)
+                with server._lock:
+                    server.in_flight -= 1
+                payload = json.dumps([[float(len(text))] for text in body["inputs"]]).encode()
+                if status != 200:
+                    payload = b"{}"
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/embed"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stand_in_server():
+    servers = []
+
+    def start(behaviour=lambda index, inputs: (200, 0)):
+        server = StandInServer(behaviour)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
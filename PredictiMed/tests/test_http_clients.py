@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from http_clients import PooledHTTPClient, PooledHuggingFaceEmbeddings, EmbeddingMicroBatcher
+
+
+def make_embeddings(server, **client_kwargs):
+    client = PooledHTTPClient(**client_kwargs)
+    return PooledHuggingFaceEmbeddings(api_key="test", model_name="test-model", api_url=server.url,
+                                       client=client, batch_window_ms=50, max_batch=4)
+
+
+def run_concurrently(fn, n):
+    results = [None] * n
+
+    def worker(i):
+        results[i] = fn(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_retries_on_503(stand_in_server, monkeypatch):
+    monkeypatch.setattr("http_clients.backoff_delay", lambda attempt: 0)
+    server = stand_in_server(lambda index, inputs: (503, 0) if index < 2 else (200, 0))
+    embeddings = make_embeddings(server, max_retries=3)
+
+    assert embeddings.embed_documents(["abc"]) == [[3.0]]
+    assert len(server.batches) == 3
+
+
+def test_gives_up_after_max_retries(stand_in_server, monkeypatch):
+    monkeypatch.setattr("http_clients.backoff_delay", lambda attempt: 0)
+    server = stand_in_server(lambda index, inputs: (503, 0))
+    embeddings = make_embeddings(server, max_retries=2)
+
+    with pytest.raises(Exception):
+        embeddings.embed_documents(["abc"])
+    assert len(server.batches) == 3
+
+
+def test_hedged_request_beats_slow_primary(stand_in_server):
+    server = stand_in_server(lambda index, inputs: (200, 2.0) if index == 0 else (200, 0))
+    embeddings = make_embeddings(server, hedge_after=0.1)
+
+    start = time.perf_counter()
+    assert embeddings.embed_documents(["ab"]) == [[2.0]]
+    assert time.perf_counter() - start < 1.0
+    assert len(server.batches) == 2
+
+
+def test_concurrent_queries_merge_into_one_batch(stand_in_server):
+    server = stand_in_server()
+    embeddings = make_embeddings(server)
+
+    results = run_concurrently(lambda i: embeddings.embed_query("x" * i), 4)
+
+    assert results == [[float(i)] for i in range(4)]
+    assert len(server.batches) == 1
+
+
+def test_batches_run_concurrently(stand_in_server):
+    server = stand_in_server(lambda index, inputs: (200, 0.3))
+    embeddings = make_embeddings(server)
+
+    start = time.perf_counter()
+    results = run_concurrently(lambda i: embeddings.embed_query("x" * i), 16)
+
+    assert results == [[float(i)] for i in range(16)]
+    assert server.max_in_flight > 1
+    assert time.perf_counter() - start < 1.0
+
+
+def test_embed_times_out():
+    batcher = EmbeddingMicroBatcher(lambda texts: time.sleep(1) or [[0.0]] * len(texts),
+                                    window_ms=1, timeout=0.1)
+    with pytest.raises(TimeoutError):
+        batcher.embed("slow")
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+
+import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+
+from index_manager import (IndexManager, IndexState, LEGACY_VERSION, current_version,
+                           is_valid_version, new_version_name, new_version_path,
+                           publish_version, version_path)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    (tmp_path / "index.faiss").write_bytes(b"")
+    return str(tmp_path)
+
+
+def add_version(db_path, version):
+    os.makedirs(os.path.join(db_path, "versions", version))
+    publish_version(db_path, version)
+
+
+def test_legacy_index_is_current_until_a_version_is_published(db_path):
+    assert current_version(db_path) == LEGACY_VERSION
+    add_version(db_path, "v1")
+    assert current_version(db_path) == "v1"
+
+
+def test_publish_prunes_old_versions(db_path):
+    for version in ["v1", "v2", "v3", "v4"]:
+        add_version(db_path, version)
+    assert sorted(os.listdir(os.path.join(db_path, "versions"))) == ["v2", "v3", "v4"]
+
+
+@pytest.mark.parametrize("version", ["../../tmp/x", "..", "v1/../..", "", None, "missing"])
+def test_rejects_unknown_versions(db_path, version):
+    add_version(db_path, "v1")
+    assert not is_valid_version(db_path, version)
+    with pytest.raises(ValueError):
+        version_path(db_path, version)
+
+
+def test_build_publish_and_load_new_version(db_path):
+    # Mirrors faissdata.create_faiss_db: save under a fresh name, publish, then load it
+    embeddings = DeterministicFakeEmbedding(size=8)
+    version = new_version_name()
+    FAISS.from_texts(["Asthma narrows the airways."], embeddings,
+                     metadatas=[{"source": "asthma"}]).save_local(new_version_path(db_path, version))
+    publish_version(db_path, version)
+
+    def build_state(version):
+        vectorstore = FAISS.load_local(version_path(db_path, version), embeddings,
+                                       allow_dangerous_deserialization=True)
+        return IndexState(version, vectorstore, None)
+
+    manager = IndexManager(db_path, build_state)
+    assert manager.load() == version
+    docs = manager.state.vectorstore.similarity_search("asthma", k=1)
+    assert docs[0].metadata["source"] == "asthma"
+
+
+@pytest.mark.parametrize("version", ["../x", "a/b", "..", ""])
+def test_new_version_path_rejects_non_plain_names(db_path, version):
+    with pytest.raises(ValueError):
+        new_version_path(db_path, version)
+
+
+def test_load_rejects_path_traversal(db_path):
+    manager = IndexManager(db_path, lambda version: IndexState(version, None, None))
+    with pytest.raises(ValueError):
+        manager.load("../../tmp/x")
+    assert manager.state is None
+
+
+def test_reload_swaps_and_drains_old_version(db_path):
+    manager = IndexManager(db_path, lambda version: IndexState(version, f"vs-{version}", f"chain-{version}"))
+    manager.load()
+    seen = []
+
+    def request():
+        with manager.acquire() as state:
+            time.sleep(0.3)
+            seen.append((state.version, state.chain))
+
+    thread = threading.Thread(target=request)
+    thread.start()
+    time.sleep(0.05)
+    add_version(db_path, "v1")
+    manager.load()
+    thread.join()
+
+    # The in-flight request finished on the version it started with
+    assert seen == [(LEGACY_VERSION, f"chain-{LEGACY_VERSION}")]
+    assert manager.version == "v1"
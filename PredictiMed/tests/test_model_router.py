@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify
+from langchain.chains.question_answering import load_qa_chain
+from langchain.prompts import PromptTemplate
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.llms.fake import FakeListLLM
+from langchain_community.vectorstores import FAISS
+
+from model_router import ModelRouter, RoutedMedicalChain
+
+FAST = "llama3-8b-8192"
+STRONG = "llama3-70b-8192"
+MODELS = ["llama3-8b-8192", "gemma-7b-it", "mixtral-8x7b-32768", "llama3-70b-8192"]
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("What is asthma?", (FAST, "definitional")),
+    ("What are the symptoms of diabetes and hypertension?", (STRONG, "multi_condition")),
+    ("What is the treatment for asthma in a patient with heart failure?", (STRONG, "multi_condition")),
+    ("What is the treatment for asthma in someone who has diabetes?", (STRONG, "multi_condition")),
+    ("Is it asthma or bronchitis?", (STRONG, "multi_condition")),
+    ("Can ibuprofen interact with warfarin?", (STRONG, "complex")),
+    ("Is metformin safe during pregnancy?", (STRONG, "complex")),
+    # One condition, however it is phrased, stays on the fast model
+    ("Can I exercise with asthma?", (FAST, "short")),
+    ("What is diabetes, briefly?", (FAST, "definitional")),
+    ("What is the treatment for a patient with diabetes?", (FAST, "definitional")),
+    ("What are the signs and symptoms of anemia?", (FAST, "definitional")),
+    ("What causes asthma and how is it treated?", (FAST, "short")),
+])
+def test_route(question, expected):
+    router = ModelRouter(MODELS)
+    assert router.route(question, [0.9]) == expected
+
+
+def test_low_retrieval_score_uses_strong_model():
+    router = ModelRouter(MODELS)
+    assert router.route("What is asthma?", [0.2]) == (STRONG, "default")
+
+
+def test_falls_back_when_primary_misses_slo():
+    router = ModelRouter(MODELS, latency_slo=0.1)
+
+    def answer(model):
+        if model == STRONG:
+            time.sleep(0.5)
+        return model
+
+    start = time.perf_counter()
+    result, model, routing = router.run("What are the symptoms of diabetes and hypertension?", [0.7], answer)
+    assert time.perf_counter() - start < 0.4
+    assert model == "mixtral-8x7b-32768"
+    assert routing["attempts"][0] == {"model": STRONG, "status": "slo_exceeded"}
+
+
+def test_fast_model_is_not_abandoned_for_a_slo_miss():
+    router = ModelRouter(MODELS, latency_slo=0.05)
+    called = []
+
+    def answer(model):
+        called.append(model)
+        time.sleep(0.2)
+        return model
+
+    result, model, routing = router.run("What is asthma?", [0.9], answer)
+    # gemma-7b is no faster than llama3-8b, so waiting beats starting over
+    assert model == FAST
+    assert called == [FAST]
+    assert routing["attempts"] == [{"model": FAST, "status": "ok"}]
+
+
+def test_fast_model_falls_back_on_error():
+    router = ModelRouter(MODELS)
+
+    def answer(model):
+        if model == FAST:
+            raise RuntimeError("unavailable")
+        return model
+
+    _, model, routing = router.run("What is asthma?", [0.9], answer)
+    assert model == "gemma-7b-it"
+    assert routing["attempts"][0] == {"model": FAST, "status": "error"}
+
+
+def test_abandoned_calls_are_bounded():
+    router = ModelRouter(MODELS, latency_slo=0.05, max_abandoned=2)
+    running = []
+    lock = threading.Lock()
+
+    def answer(model):
+        with lock:
+            running.append(model)
+        if model == STRONG:
+            time.sleep(0.3)
+        return model
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        router.run("What are the symptoms of diabetes and hypertension?", [0.7], answer)[1]))
+        for _ in range(6)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Only two calls were abandoned; the rest waited for the primary instead of piling on fallbacks
+    assert results.count("mixtral-8x7b-32768") == 2
+    assert results.count(STRONG) == 4
+    assert running.count("mixtral-8x7b-32768") == 2
+    assert time.perf_counter() - start < 1.0
+
+
+def test_routed_response_is_json_serializable():
+    vectorstore = FAISS.from_texts(
+        ["Asthma is a chronic disease of the airways.", "Diabetes affects blood sugar."],
+        DeterministicFakeEmbedding(size=16),
+        metadatas=[{"source": "asthma"}, {"source": "diabetes"}],
+    )
+    prompt = PromptTemplate(template="{context}\n{question}", input_variables=["context", "question"])
+    qa_chains = {model: load_qa_chain(FakeListLLM(responses=[f"answer from {model}"]),
+                                      chain_type="stuff", prompt=prompt)
+                 for model in MODELS}
+    chain = RoutedMedicalChain(ModelRouter(MODELS), qa_chains, vectorstore, k=2)
+
+    response = chain({"query": "What is asthma?"})
+
+    assert all(type(score) is float for score in response["routing"]["retrieval_scores"])
+    with Flask(__name__).app_context():
+        body = jsonify({
+            "answer": response["result"],
+            "model": response["model"],
+            "routing": response["routing"],
+        }).get_json()
+    assert body["answer"] == f"answer from {response['model']}"
@@ -1,13 +1,23 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from medical_simplifier import MedicalTextSimplifier
 from flask_cors import CORS
+import codecs
+import json
+import os
 import re
+import sys
+
+# Shared admin/profiling endpoints live in onehealth_common at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from onehealth_common.admin import admin_bp
 
 app = Flask(__name__)
 # Enable CORS for all routes
 CORS(app)
 simplifier = MedicalTextSimplifier()
 
+app.register_blueprint(admin_bp)
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -60,6 +70,35 @@ def api_simplify():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def iter_request_text(chunk_size=8192):
+    """Stream the request body as text chunks without buffering it whole."""
+    if request.is_json:
+        yield request.get_json().get('text', '')
+        return
+    # Incremental decoding keeps multi-byte characters split across reads intact
+    decoder = codecs.getincrementaldecoder(request.mimetype_params.get('charset', 'utf-8'))(errors='replace')
+    while True:
+        chunk = request.stream.read(chunk_size)
+        if not chunk:
+            break
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+@app.route('/api/medical/simplify/stream', methods=['POST'])
+def api_simplify_stream():
+    """Simplify a long report window by window, returning NDJSON as each window is done.
+
+    Accepts either JSON ({"text": ...}) or a raw text/plain body.
+    """
+    def generate():
+        try:
+            for segment in simplifier.iter_simplified_segments(iter_request_text()):
+                yield json.dumps(segment) + "\n"
+        except Exception as e:
+            yield json.dumps({'error': str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 # Add the original route to maintain compatibility with HTML frontend
 @app.route('/simplify', methods=['POST'])
 def simplify():
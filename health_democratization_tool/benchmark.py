@@ -0,0 +1,373 @@
+"""Benchmark and load test for MedicalTextSimplifier.
+
+Times the simplifier's stages on a synthetic clinical corpus, then load-tests
+/api/medical/simplify at one or more concurrency levels, and prints a JSON
+report (latency percentiles, docs/sec, and per concurrency level the
+server's peak RSS and thread usage).
+
+    python benchmark.py --tiny-model --concurrency 1,4,8 --output bench.json
+
+--tiny-model builds a small randomly initialised BERT in a temp directory so
+the run needs no model download; timings then reflect the pipeline rather
+than BioLinkBERT itself. The NLTK data (punkt, wordnet, POS tagger) must be
+installed for an offline run; the benchmark exits with the exact
+nltk.downloader command if it is missing. --url load-tests an already running server instead
+of an in-process one; the app is then not imported, component timings are
+skipped, and process stats come from the server's /api/admin/process
+(pass --admin-token or set ADMIN_TOKEN). If that endpoint is unreachable the
+stats describe this client process and are marked "source": "client".
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from onehealth_common.admin import process_stats
+
+MEDICAL_TERMS = [
+    "asthma", "pneumonia", "hypertension", "diabetes", "insulin", "biopsy",
+    "fracture", "inflammation", "anemia", "tumor", "antibiotic", "vaccine",
+    "catheter", "stethoscope", "fever", "infection", "migraine", "arthritis",
+    "bronchitis", "lesion", "ultrasound", "electrocardiogram", "dialysis",
+    "chemotherapy", "sedation", "tachycardia", "edema", "sepsis"
+]
+
+FILLER_WORDS = [
+    "the", "patient", "was", "seen", "today", "and", "reported", "with", "after",
+    "during", "visit", "follow", "up", "in", "two", "weeks", "no", "new", "symptoms",
+    "noted", "plan", "to", "continue", "current", "management", "stable",
+    "overnight", "family", "history", "is", "unremarkable", "for", "of", "on", "review"
+]
+
+
+def generate_document(rng, n_words, term_density):
+    """Synthetic clinical note of roughly ``n_words`` words."""
+    sentences = []
+    words_left = n_words
+    while words_left > 0:
+        length = min(words_left, rng.randint(8, 20))
+        words = [rng.choice(MEDICAL_TERMS) if rng.random() < term_density else rng.choice(FILLER_WORDS)
+                 for _ in range(length)]
+        words[0] = words[0].capitalize()
+        sentences.append(" ".join(words) + ".")
+        words_left -= length
+    return " ".join(sentences)
+
+
+def generate_corpus(lengths, densities, docs_per_bucket, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for n_words in lengths:
+        for density in densities:
+            for _ in range(docs_per_bucket):
+                corpus.append({
+                    "words": n_words,
+                    "density": density,
+                    "text": generate_document(rng, n_words, density)
+                })
+    return corpus
+
+
+def build_tiny_model(directory):
+    """Save a tiny random BERT plus a tokenizer over the corpus vocabulary."""
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", ".", ",", ":", "(", ")"]
+    vocab += sorted(set(MEDICAL_TERMS + FILLER_WORDS + ["a", "medical", "procedure", "condition",
+                                                        "treatment", "test", "device"]))
+    vocab += list(letters) + ["##" + c for c in letters]
+    vocab_path = os.path.join(directory, "vocab.txt")
+    with open(vocab_path, "w") as f:
+        f.write("\n".join(vocab))
+
+    BertTokenizerFast(vocab_file=vocab_path, do_lower_case=True).save_pretrained(directory)
+    config = BertConfig(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2,
+                        num_attention_heads=2, intermediate_size=64, max_position_embeddings=512)
+    BertModel(config).save_pretrained(directory)
+    return directory
+
+
+def summarize(latencies):
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": 1000 * sum(ordered) / len(ordered),
+        "p50_ms": 1000 * pct(50),
+        "p95_ms": 1000 * pct(95),
+        "p99_ms": 1000 * pct(99),
+        "total_s": sum(ordered)
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def benchmark_components(app_module, corpus):
+    simplifier = app_module.simplifier
+    timings = {name: [] for name in ("identify_medical_terms", "is_medical_term", "get_medical_context",
+                                     "generate_simplified_explanation", "process_text")}
+
+    for doc in corpus:
+        text = doc["text"]
+        terms, elapsed = timed(simplifier.identify_medical_terms, text)
+        timings["identify_medical_terms"].append(elapsed)
+        for term_info in terms:
+            term = term_info["term"]
+            timings["is_medical_term"].append(timed(simplifier.is_medical_term, term.lower())[1])
+            timings["get_medical_context"].append(timed(simplifier.get_medical_context, term, text)[1])
+            timings["generate_simplified_explanation"].append(
+                timed(simplifier.generate_simplified_explanation, term, text)[1]
+            )
+
+    # End to end, as the API does it
+    with app_module.app.app_context():
+        for doc in corpus:
+            timings["process_text"].append(timed(app_module.process_text, doc["text"])[1])
+
+    report = {name: summarize(values) for name, values in timings.items()}
+    total = report["process_text"].get("total_s") or 0
+    report["process_text"]["docs_per_sec"] = len(corpus) / total if total else None
+    return report
+
+
+def post_json(url, payload, timeout):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+
+def load_test(url, corpus, concurrency, n_requests, timeout=300):
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            post_json(url, {"text": corpus[i % len(corpus)]["text"]}, timeout)
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(n_requests)))
+    wall = time.perf_counter() - start
+
+    result = summarize(latencies)
+    result.update({
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "errors": errors,
+        "wall_s": wall,
+        "docs_per_sec": len(latencies) / wall if wall else None
+    })
+    return result
+
+
+def start_local_server(app):
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        # Per-request access logs would drown out the report
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/medical/simplify"
+
+
+def remote_stats_fn(url, admin_token, timeout=10):
+    """Fetch process stats from the server behind ``url``'s /api/admin/process."""
+    parts = urllib.parse.urlsplit(url)
+    stats_url = f"{parts.scheme}://{parts.netloc}/api/admin/process"
+
+    def fetch():
+        request = urllib.request.Request(stats_url, headers={"X-Admin-Token": admin_token or ""})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+
+    return fetch
+
+
+class RSSMonitor:
+    """Polls ``stats_fn`` in the background and keeps the highest RSS seen.
+
+    ru_maxrss only ever grows, so sampling current RSS is what gives each
+    concurrency level its own peak.
+    """
+
+    def __init__(self, stats_fn, interval=0.25):
+        self.stats_fn = stats_fn
+        self.interval = interval
+        self.peak_rss_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-monitor", daemon=True)
+
+    def _sample(self):
+        try:
+            rss = self.stats_fn().get("rss_mb")
+        except Exception:
+            return
+        if rss is not None and (self.peak_rss_mb is None or rss > self.peak_rss_mb):
+            self.peak_rss_mb = rss
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def level_stats(stats_fn, source, monitor):
+    stats = dict(stats_fn())
+    # Without /proc there is no current RSS to sample; fall back to the lifetime peak
+    stats["lifetime_peak_rss_mb"] = stats.pop("peak_rss_mb")
+    samples = [rss for rss in (monitor.peak_rss_mb, stats.get("rss_mb")) if rss is not None]
+    stats["peak_rss_mb"] = max(samples) if samples else stats["lifetime_peak_rss_mb"]
+    stats["source"] = source
+    return stats
+
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def parse_float_list(value):
+    return [float(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MedicalTextSimplifier and /api/medical/simplify")
+    parser.add_argument("--lengths", type=parse_int_list, default=[50, 200, 800],
+                        help="comma-separated document lengths in words")
+    parser.add_argument("--densities", type=parse_float_list, default=[0.05, 0.2],
+                        help="comma-separated fraction of words that are medical terms")
+    parser.add_argument("--docs", type=int, default=3, help="documents per length/density bucket")
+    parser.add_argument("--concurrency", type=parse_int_list, default=[1, 4],
+                        help="comma-separated load-test concurrency levels")
+    parser.add_argument("--requests", type=int, default=20, help="requests per concurrency level")
+    parser.add_argument("--url", help="load-test this running server instead of an in-process one")
+    parser.add_argument("--admin-token", default=os.getenv("ADMIN_TOKEN"),
+                        help="X-Admin-Token for the server's /api/admin/process (with --url)")
+    parser.add_argument("--tiny-model", action="store_true", help="use a tiny local stand-in model")
+    parser.add_argument("--model", help="model id or directory (overrides SIMPLIFIER_MODEL)")
+    parser.add_argument("--torch-threads", type=int, help="torch.set_num_threads before running")
+    parser.add_argument("--skip-components", action="store_true", help="only run the load test")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    tiny_dir = None
+    app_module = None
+    if not args.url:
+        # Fail before building or loading a model if the NLTK data can't be found or downloaded
+        import medical_simplifier
+        if medical_simplifier.MISSING_NLTK_DATA:
+            missing = " ".join(medical_simplifier.MISSING_NLTK_DATA)
+            parser.error(f"NLTK data not installed and could not be downloaded: {missing}. "
+                         f"Install it once with 'python -m nltk.downloader {missing}' "
+                         f"(set NLTK_DATA to use a shared directory) to run offline.")
+
+        if args.tiny_model:
+            tiny_dir = tempfile.TemporaryDirectory(prefix="tiny-simplifier-")
+            os.environ["SIMPLIFIER_MODEL"] = build_tiny_model(tiny_dir.name)
+        elif args.model:
+            os.environ["SIMPLIFIER_MODEL"] = args.model
+
+        if args.torch_threads:
+            import torch
+            torch.set_num_threads(args.torch_threads)
+
+        # Imported late so the app's simplifier picks up SIMPLIFIER_MODEL
+        import app as app_module
+    elif args.tiny_model or args.model or args.torch_threads:
+        print("--tiny-model, --model and --torch-threads only apply in-process; ignored with --url",
+              file=sys.stderr)
+
+    corpus = generate_corpus(args.lengths, args.densities, args.docs, args.seed)
+    report = {
+        "model": "remote" if args.url else os.getenv("SIMPLIFIER_MODEL", "default"),
+        "corpus": {
+            "documents": len(corpus),
+            "lengths": args.lengths,
+            "densities": args.densities
+        }
+    }
+
+    if app_module is None:
+        print("Skipping component timings: they need the in-process app", file=sys.stderr)
+    elif not args.skip_components:
+        print("Timing simplifier components...", file=sys.stderr)
+        report["components"] = benchmark_components(app_module, corpus)
+
+    server = None
+    url = args.url
+    if url:
+        stats_fn, source = remote_stats_fn(url, args.admin_token), "server"
+        try:
+            stats_fn()
+        except Exception as e:
+            print(f"Server stats unavailable ({e}); reporting this client's process instead",
+                  file=sys.stderr)
+            stats_fn, source = process_stats, "client"
+    else:
+        # The in-process server shares this process, so local stats are the server's
+        server, url = start_local_server(app_module.app)
+        stats_fn, source = process_stats, "server"
+
+    report["load_test"] = []
+    for concurrency in args.concurrency:
+        print(f"Load testing {url} at concurrency {concurrency}...", file=sys.stderr)
+        with RSSMonitor(stats_fn) as monitor:
+            result = load_test(url, corpus, concurrency, args.requests)
+        result["process"] = level_stats(stats_fn, source, monitor)
+        report["load_test"].append(result)
+    if server is not None:
+        server.shutdown()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if tiny_dir is not None:
+        tiny_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,128 @@
 from transformers import AutoTokenizer, AutoModel
 import nltk
-from nltk.tokenize import word_tokenize
+from nltk.tokenize import word_tokenize, sent_tokenize
 from nltk.corpus import wordnet
 import torch
+import os
 import re
 import sys
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 
-# Download required NLTK data
-nltk.download('punkt')
-nltk.download('wordnet')
-nltk.download('averaged_perceptron_tagger')
+# Hugging Face model id or local directory; benchmarks point this at a tiny stand-in
+DEFAULT_MODEL_NAME = "michiyasunaga/BioLinkBERT-base"
+
+# Sliding-window settings for long documents. A window holds sentences (split
+# further on newlines, or by words if still too long) up to WINDOW_MAX_TOKENS
+# model tokens, leaving room for "{term} : " inside MODEL_MAX_TOKENS. Up to
+# WINDOW_OVERLAP_SENTENCES trailing sentences of the previous window are added
+# as extra context, but only as many as fit in the remaining budget.
+MODEL_MAX_TOKENS = 512
+# [CLS], [SEP] and the ":" between term and context
+SPECIAL_TOKENS = 3
+WINDOW_MAX_TOKENS = 384
+WINDOW_OVERLAP_SENTENCES = 1
+# Terms classified per forward pass; bounds activation memory for term-dense text
+CLASSIFY_BATCH_SIZE = 8
+# Unterminated text longer than this is split even without a sentence boundary
+MAX_PENDING_CHARS = 20000
+
+COMMON_EXPLANATIONS = [
+    "a medical procedure",
+    "a medical condition",
+    "a medical treatment",
+    "a medical test",
+    "a medical device"
+]
+
+# NLTK data the simplifier needs: a check that raises LookupError while the data
+# is missing, and the packages to try, newest NLTK name first
+NLTK_DATA = [
+    (lambda: sent_tokenize("Check."), ["punkt_tab", "punkt"]),
+    (lambda: wordnet.synsets("check"), ["wordnet"]),
+    (lambda: nltk.pos_tag(["check"]), ["averaged_perceptron_tagger_eng", "averaged_perceptron_tagger"]),
+]
+
+def ensure_nltk_data():
+    """Download only the NLTK data that isn't installed yet; returns what is still missing."""
+    missing = []
+    for check, packages in NLTK_DATA:
+        for package in [None] + packages:
+            if package is not None:
+                try:
+                    nltk.download(package, quiet=True)
+                except Exception as e:
+                    print(f"Could not download NLTK data {package}: {e}")
+            try:
+                check()
+                break
+            except LookupError:
+                continue
+        else:
+            missing.append(packages[0])
+    if missing:
+        print(f"Missing NLTK data: {', '.join(missing)} (offline? run: python -m nltk.downloader {' '.join(missing)})")
+    return missing
+
+MISSING_NLTK_DATA = ensure_nltk_data()
 
 class MedicalTextSimplifier:
-    def __init__(self):
-        print("Loading BioLinkBERT model...")
+    def __init__(self, model_name=None):
+        model_name = model_name or os.getenv("SIMPLIFIER_MODEL", DEFAULT_MODEL_NAME)
+        print(f"Loading {model_name} model...")
         try:
             # Initialize BioLinkBERT
-            self.tokenizer = AutoTokenizer.from_pretrained("michiyasunaga/BioLinkBERT-base")
-            self.model = AutoModel.from_pretrained("michiyasunaga/BioLinkBERT-base")
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self.model = AutoModel.from_pretrained(model_name)
             print("Model loaded successfully!")
         except Exception as e:
             print(f"Error loading model: {e}")
             print("Please ensure you have the required dependencies installed:")
             print("pip install -r requirements.txt")
             sys.exit(1)
+        self._explanation_embeddings = None
 
-    def get_medical_context(self, term, text):
-        try:
+    def get_explanation_embeddings(self):
+        # The explanation labels never change, so encode them once
+        if self._explanation_embeddings is None:
+            explanation_inputs = self.tokenizer(
+                COMMON_EXPLANATIONS,
+                return_tensors="pt",
+                padding=True,
+                truncation=True
+            )
+            
+            with torch.no_grad():
+                explanation_outputs = self.model(**explanation_inputs)
+                self._explanation_embeddings = explanation_outputs.last_hidden_state[:, 0, :].numpy()
+        return self._explanation_embeddings
+
+    def classify_terms(self, terms, text, max_term_tokens=None):
+        """Explanation type for each term, batching ``CLASSIFY_BATCH_SIZE`` terms per forward pass.
+
+        Each term still gets its own "{term} : {text}" row, so a window with N
+        terms encodes N full-length rows: batching saves per-call overhead,
+        not encoder work. Sharing one encoding of ``text`` would mean scoring
+        token spans instead of the [CLS] of the term/context pair, which would
+        change the explanations.
+
+        ``max_term_tokens`` shortens over-long terms in the model input so the
+        term never pushes the end of ``text`` past the 512-token limit.
+        """
+        terms = list(dict.fromkeys(terms))
+        types = {}
+        for start in range(0, len(terms), CLASSIFY_BATCH_SIZE):
+            batch = terms[start:start + CLASSIFY_BATCH_SIZE]
+            labels = batch
+            if max_term_tokens is not None:
+                labels = [self.tokenizer.convert_tokens_to_string(self.tokenizer.tokenize(term)[:max_term_tokens])
+                          for term in batch]
+            
             # Prepare the input for BioLinkBERT
             inputs = self.tokenizer(
-                f"{term} : {text}",
+                [f"{label} : {text}" for label in labels],
                 return_tensors="pt",
-                max_length=512,
+                max_length=MODEL_MAX_TOKENS,
                 truncation=True,
                 padding=True
             )
@@ -43,36 +132,17 @@ class MedicalTextSimplifier:
                 outputs = self.model(**inputs)
                 embeddings = outputs.last_hidden_state[:, 0, :]  # Get [CLS] token embedding
             
-            # Convert to numpy for similarity calculation
-            embeddings = embeddings.numpy()
-            
-            # Get embeddings for some common medical explanations
-            common_explanations = [
-                "a medical procedure",
-                "a medical condition",
-                "a medical treatment",
-                "a medical test",
-                "a medical device"
-            ]
-            
-            explanation_inputs = self.tokenizer(
-                common_explanations,
-                return_tensors="pt",
-                padding=True,
-                truncation=True
-            )
-            
-            with torch.no_grad():
-                explanation_outputs = self.model(**explanation_inputs)
-                explanation_embeddings = explanation_outputs.last_hidden_state[:, 0, :].numpy()
-            
             # Calculate similarity with common explanations
-            similarities = cosine_similarity(embeddings, explanation_embeddings)
-            best_match_idx = np.argmax(similarities[0])
-            
-            # Return the most similar explanation type
-            return common_explanations[best_match_idx]
+            similarities = cosine_similarity(embeddings.numpy(), self.get_explanation_embeddings())
+            best_match_idx = np.argmax(similarities, axis=1)
             
+            # Keep the most similar explanation type per term
+            types.update({term: COMMON_EXPLANATIONS[idx] for term, idx in zip(batch, best_match_idx)})
+        return types
+
+    def get_medical_context(self, term, text):
+        try:
+            return self.classify_terms([term], text)[term]
         except Exception as e:
             print(f"Error getting medical context: {e}")
             return None
@@ -90,10 +160,11 @@ class MedicalTextSimplifier:
                 return True
         return False
 
-    def generate_simplified_explanation(self, term, context):
+    def generate_simplified_explanation(self, term, context, explanation_type=None):
         try:
             # Get explanation type from BioLinkBERT
-            explanation_type = self.get_medical_context(term, context)
+            if explanation_type is None:
+                explanation_type = self.get_medical_context(term, context)
             if explanation_type:
                 # Get WordNet definition for more details
                 synsets = wordnet.synsets(term)
@@ -142,6 +213,137 @@ class MedicalTextSimplifier:
         
         return medical_terms
 
+    def iter_sentences(self, chunks):
+        """Yield complete sentences from an iterable of text chunks.
+
+        Only the trailing, not yet terminated sentence is kept in memory.
+        """
+        if isinstance(chunks, str):
+            chunks = [chunks]
+        pending = ""
+        for chunk in chunks:
+            pending += chunk
+            sentences = sent_tokenize(pending)
+            if len(sentences) > 1:
+                yield from sentences[:-1]
+                # Keep the unfinished tail (from the start of the last sentence)
+                pending = pending[max(0, pending.rfind(sentences[-1])):]
+            while len(pending) > MAX_PENDING_CHARS:
+                cut = pending.rfind(" ", 0, MAX_PENDING_CHARS)
+                cut = cut if cut > 0 else MAX_PENDING_CHARS
+                yield pending[:cut]
+                pending = pending[cut:].lstrip()
+        if pending.strip():
+            yield from sent_tokenize(pending)
+
+    def split_to_fit(self, sentence, max_tokens=WINDOW_MAX_TOKENS):
+        """Yield ``(piece, n_tokens)`` pieces of a sentence, each at most ``max_tokens``.
+
+        Punkt doesn't split on newlines, so line-based notes are split per line
+        first; a line that is still too long is packed word by word.
+        """
+        for line in sentence.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            n_tokens = len(self.tokenizer.tokenize(line))
+            if n_tokens <= max_tokens:
+                yield line, n_tokens
+                continue
+            piece, piece_tokens = [], 0
+            for word in line.split():
+                word_tokens = len(self.tokenizer.tokenize(word))
+                if piece and piece_tokens + word_tokens > max_tokens:
+                    yield " ".join(piece), piece_tokens
+                    piece, piece_tokens = [], 0
+                piece.append(word)
+                piece_tokens += word_tokens
+            if piece:
+                yield " ".join(piece), piece_tokens
+
+    def iter_token_windows(self, chunks, max_tokens=WINDOW_MAX_TOKENS):
+        """Group sentence pieces into windows of ``(piece, n_tokens)`` totalling at most ``max_tokens``."""
+        window, window_tokens = [], 0
+        for sentence in self.iter_sentences(chunks):
+            for piece, n_tokens in self.split_to_fit(sentence, max_tokens):
+                if window and window_tokens + n_tokens > max_tokens:
+                    yield window
+                    window, window_tokens = [], 0
+                window.append((piece, n_tokens))
+                window_tokens += n_tokens
+        if window:
+            yield window
+
+    def iter_windows(self, chunks, max_tokens=WINDOW_MAX_TOKENS):
+        """Group sentences into windows of at most ``max_tokens`` model tokens."""
+        for window in self.iter_token_windows(chunks, max_tokens):
+            yield [piece for piece, _ in window]
+
+    def iter_simplified_segments(self, chunks, max_tokens=WINDOW_MAX_TOKENS,
+                                 overlap=WINDOW_OVERLAP_SENTENCES):
+        """Annotate an arbitrarily long document window by window.
+
+        ``chunks`` is a string or any iterable of text pieces (e.g. lines of a
+        file or a request stream). Each term is classified against its own
+        window only; "{term} : {overlap + window}" always fits the model
+        limit, so nothing in the window is truncated away. Yields one dict per
+        window as soon as it is processed.
+        """
+        max_tokens = min(max_tokens, MODEL_MAX_TOKENS - SPECIAL_TOKENS - 1)
+        previous = []
+        for index, window in enumerate(self.iter_token_windows(chunks, max_tokens)):
+            sentences = [piece for piece, _ in window]
+            window_tokens = sum(n_tokens for _, n_tokens in window)
+            segment = " ".join(sentences)
+            
+            medical_terms = self.identify_medical_terms(segment)
+            terms = [t['term'] for t in medical_terms]
+            
+            # Whatever the window leaves goes to the term, then to overlap sentences
+            max_term_tokens = MODEL_MAX_TOKENS - SPECIAL_TOKENS - window_tokens
+            term_tokens = max((min(len(self.tokenizer.tokenize(term)), max_term_tokens) for term in terms),
+                              default=0)
+            budget = max_term_tokens - term_tokens
+            overlap_sentences = []
+            for sentence, n_tokens in reversed(previous[-overlap:] if overlap else []):
+                if n_tokens > budget:
+                    break
+                overlap_sentences.insert(0, sentence)
+                budget -= n_tokens
+            context = " ".join(overlap_sentences + sentences)
+            previous = window
+            
+            try:
+                types = self.classify_terms(terms, context, max_term_tokens=max_term_tokens)
+            except Exception as e:
+                print(f"Error getting medical context: {e}")
+                types = {}
+            
+            simplified_text = segment
+            explanations = []
+            explained = {}
+            for term_info in medical_terms:
+                term = term_info['term']
+                if term not in explained:
+                    # An empty type skips a second model call and falls back to WordNet
+                    explained[term] = self.generate_simplified_explanation(
+                        term, context, types.get(term) or ""
+                    )
+                    explanations.append({
+                        'term': term,
+                        'explanation': explained[term],
+                        'position': term_info['position']
+                    })
+                    pattern = r'\b' + re.escape(term) + r'\b'
+                    simplified_text = re.sub(pattern, f"{term} ({explained[term]})", simplified_text)
+            
+            yield {
+                'segment': index,
+                'text': segment,
+                'simplified_text': simplified_text,
+                'explanations': explanations
+            }
+
     def simplify_text(self, text):
         print("\nOriginal text:")
         print(text)
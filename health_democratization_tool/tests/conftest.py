@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# The service modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stand_ins import TERMS, WORDS
+
+
+@pytest.fixture(scope="session")
+def tiny_vocab_dir(tmp_path_factory):
+    """Directory with a BERT WordPiece vocab covering the test corpus."""
+    directory = tmp_path_factory.mktemp("tiny-tokenizer")
+    letters = "abcdefghijklmnopqrstuvwxyz0123456789"
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", ".", ",", ":", "-", "!", "?", "é"]
+    vocab += sorted(TERMS) + WORDS + list(letters) + ["##" + c for c in letters]
+    with open(directory / "vocab.txt", "w") as f:
+        f.write("\n".join(vocab))
+    return str(directory)
+
+
+@pytest.fixture(scope="session")
+def tokenizer(tiny_vocab_dir):
+    from transformers import BertTokenizerFast
+    return BertTokenizerFast(vocab_file=os.path.join(tiny_vocab_dir, "vocab.txt"), do_lower_case=True)
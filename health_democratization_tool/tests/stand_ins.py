@@ -0,0 +1,16 @@
+import re
+
+# Stand-ins for the medical vocabulary and NLTK models, so tests need no downloads
+TERMS = {"asthma", "hypertension", "diabetes", "pneumonia", "anemia", "sepsis"}
+WORDS = ["the", "patient", "was", "seen", "today", "with", "and", "no", "new", "symptoms",
+         "plan", "to", "continue", "current", "management", "follow", "up", "in", "two", "weeks"]
+
+
+def split_sentences(text):
+    """Punkt stand-in: split after . ! or ? followed by whitespace."""
+    return [s for s in re.split(r"(?<=[.!?])\s+", text.strip()) if s]
+
+
+def find_terms(text):
+    return [{"term": word, "position": i}
+            for i, word in enumerate(re.findall(r"[\w-]+", text)) if word.lower() in TERMS]
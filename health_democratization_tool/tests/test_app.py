@@ -0,0 +1,77 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+
+from stand_ins import find_terms, split_sentences
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    import benchmark
+
+    # The app builds its simplifier at import; point it at a tiny local model
+    model_dir = benchmark.build_tiny_model(str(tmp_path_factory.mktemp("tiny-model")))
+    previous = os.environ.get("SIMPLIFIER_MODEL")
+    os.environ["SIMPLIFIER_MODEL"] = model_dir
+    try:
+        import app
+    finally:
+        if previous is None:
+            os.environ.pop("SIMPLIFIER_MODEL")
+        else:
+            os.environ["SIMPLIFIER_MODEL"] = previous
+    return app
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    import medical_simplifier
+
+    monkeypatch.setattr(medical_simplifier, "sent_tokenize", split_sentences)
+    simplifier = app_module.simplifier
+    monkeypatch.setattr(simplifier, "identify_medical_terms", find_terms)
+    # WordNet definitions need NLTK data; the explanation type comes from the model
+    monkeypatch.setattr(simplifier, "generate_simplified_explanation",
+                        lambda term, context, explanation_type=None: explanation_type)
+    return app_module.app.test_client()
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_stream_returns_one_line_per_window(client):
+    # Long enough for several windows and several 8 KiB reads, with a multi-byte
+    # character straddling a read boundary
+    sentence = "The patient with asthma and hypertension was seen today. "
+    text = sentence * 150
+    text = text[:8191] + "é" + text[8191:]
+
+    response = client.post("/api/medical/simplify/stream", data=text.encode("utf-8"),
+                           content_type="text/plain; charset=utf-8")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    segments = read_ndjson(response)
+    assert len(segments) > 1
+    assert all("error" not in segment for segment in segments)
+    assert [segment["segment"] for segment in segments] == list(range(len(segments)))
+    assert " ".join(segment["text"] for segment in segments).split() == text.split()
+    terms = {e["term"] for segment in segments for e in segment["explanations"]}
+    assert terms == {"asthma", "hypertension"}
+
+
+def test_stream_accepts_json(client):
+    response = client.post("/api/medical/simplify/stream", json={"text": "Sepsis was ruled out."})
+    segments = read_ndjson(response)
+    assert len(segments) == 1
+    assert segments[0]["explanations"][0]["term"] == "Sepsis"
+
+
+def test_shared_admin_endpoints_are_registered(client):
+    # Provided by onehealth_common.admin; calls without a token are refused
+    assert client.get("/api/admin/process").status_code == 401
+    assert client.get("/api/admin/profile/slow").status_code == 401
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+pytest.importorskip("torch")
+
+import medical_simplifier
+from medical_simplifier import MODEL_MAX_TOKENS, MedicalTextSimplifier
+
+from stand_ins import TERMS, WORDS, find_terms, split_sentences
+
+
+@pytest.fixture
+def simplifier(tokenizer, monkeypatch):
+    monkeypatch.setattr(medical_simplifier, "sent_tokenize", split_sentences)
+    simplifier = MedicalTextSimplifier.__new__(MedicalTextSimplifier)
+    simplifier.tokenizer = tokenizer
+    simplifier._explanation_embeddings = None
+    simplifier.classify_calls = []
+
+    def classify_terms(terms, text, max_term_tokens=None):
+        simplifier.classify_calls.append((list(terms), text, max_term_tokens))
+        return {term: "a medical condition" for term in terms}
+
+    simplifier.classify_terms = classify_terms
+    simplifier.identify_medical_terms = find_terms
+    simplifier.generate_simplified_explanation = lambda term, context, explanation_type=None: explanation_type
+    return simplifier
+
+
+def sentence(rng, n_words):
+    words = [rng.choice(sorted(TERMS)) if rng.random() < 0.2 else rng.choice(WORDS) for _ in range(n_words)]
+    return " ".join(words).capitalize() + "."
+
+
+def model_input_tokens(tokenizer, term, context, max_term_tokens):
+    # classify_terms shortens the term the same way before building "{term} : {context}"
+    label = tokenizer.convert_tokens_to_string(tokenizer.tokenize(term)[:max_term_tokens])
+    return len(tokenizer(f"{label} : {context}")["input_ids"])
+
+
+def test_term_overlap_and_window_fit_the_model(simplifier, tokenizer):
+    rng = random.Random(0)
+    # Sentence lengths around the window size force overlap trimming at every boundary
+    text = " ".join(sentence(rng, rng.choice([5, 60, 150, 300, 370])) for _ in range(40))
+    long_term = " ".join(["pneumonia"] * 200)
+    simplifier.identify_medical_terms = lambda segment: find_terms(segment) + [{"term": long_term, "position": 0}]
+
+    segments = list(simplifier.iter_simplified_segments(text))
+
+    assert len(segments) == len(simplifier.classify_calls) > 1
+    with_overlap = 0
+    for segment, (terms, context, max_term_tokens) in zip(segments, simplifier.classify_calls):
+        # The window itself is never cut: it is the tail of what the model sees
+        assert context.endswith(segment["text"])
+        with_overlap += context != segment["text"]
+        for term in terms:
+            assert model_input_tokens(tokenizer, term, context, max_term_tokens) <= MODEL_MAX_TOKENS
+    assert with_overlap
+
+
+def test_segments_cover_the_whole_document(simplifier):
+    rng = random.Random(1)
+    text = " ".join(sentence(rng, rng.randint(3, 40)) for _ in range(200))
+    segments = list(simplifier.iter_simplified_segments(text))
+    assert " ".join(segment["text"] for segment in segments).split() == text.split()
+    assert any("(a medical condition)" in segment["simplified_text"] for segment in segments)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1000])
+def test_chunked_input_splits_like_the_whole_string(simplifier, chunk_size):
+    rng = random.Random(2)
+    text = " ".join(sentence(rng, rng.randint(1, 30)) for _ in range(50))
+    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+    assert list(simplifier.iter_sentences(chunks)) == list(simplifier.iter_sentences(text))
+
+
+def test_unterminated_stream_is_bounded(simplifier, monkeypatch):
+    monkeypatch.setattr(medical_simplifier, "MAX_PENDING_CHARS", 100)
+    text = " ".join(["asthma"] * 500)
+    chunks = [text[i:i + 30] for i in range(0, len(text), 30)]
+    pieces = list(simplifier.iter_sentences(chunks))
+    assert len(pieces) > 1
+    assert all(len(piece) <= 100 for piece in pieces)
+    assert " ".join(pieces).split() == text.split()
+
+
+def test_long_unpunctuated_line_is_split(simplifier):
+    line = " ".join(["hypertension"] * 2000)
+    pieces = list(simplifier.split_to_fit(line, max_tokens=50))
+    assert len(pieces) > 1
+    assert all(n_tokens <= 50 for _, n_tokens in pieces)
+    assert " ".join(piece for piece, _ in pieces) == line
+
+    windows = list(simplifier.iter_token_windows(line, max_tokens=50))
+    assert all(sum(n_tokens for _, n_tokens in window) <= 50 for window in windows)
+
+
+def test_line_based_notes_split_per_line(simplifier):
+    note = "\n".join(f"- asthma follow up in {i} weeks" for i in range(10))
+    pieces = [piece for piece, _ in simplifier.split_to_fit(note)]
+    assert pieces == [line for line in note.splitlines()]
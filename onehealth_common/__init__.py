@@ -0,0 +1,5 @@
+"""Code shared by the PredictiMed and health_democratization_tool Flask services.
+
+Both services run from their own directory (``python app.py``), so each adds
+the repository root to ``sys.path`` before importing this package.
+"""
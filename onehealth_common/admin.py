@@ -0,0 +1,114 @@
+import hmac
+import os
+import resource
+import sys
+import threading
+import time
+from functools import wraps
+
+from flask import Blueprint, Response, g, jsonify, request
+
+from .sampling_profiler import SamplingProfiler, SlowRequestProfiler, format_collapsed
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+profiler = SamplingProfiler()
+slow_request_profiler = SlowRequestProfiler()
+
+# Register with app.register_blueprint(admin_bp); the request hooks below apply app-wide
+admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
+
+
+def read_proc_status(*fields):
+    """Integer values of ``fields`` from /proc/self/status (None off Linux)."""
+    values = dict.fromkeys(fields)
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in values:
+                    values[name] = int(value.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def process_stats():
+    """Memory and thread usage of this process."""
+    status = read_proc_status("VmRSS", "Threads")
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    stats = {
+        "pid": os.getpid(),
+        "rss_mb": status["VmRSS"] / 1024 if status["VmRSS"] is not None else None,
+        "peak_rss_mb": max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024,
+        "python_threads": threading.active_count(),
+        "os_threads": status["Threads"]
+    }
+    # Only report torch if the service actually loaded it
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        stats["torch_num_threads"] = torch.get_num_threads()
+        stats["torch_num_interop_threads"] = torch.get_num_interop_threads()
+    return stats
+
+
+def admin_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get('X-Admin-Token', '')
+        if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@admin_bp.before_app_request
+def start_request_profile():
+    # Profile requests block on purpose, so don't report them as slow
+    if request.path.startswith('/api/admin/profile'):
+        return
+    g.request_start = time.perf_counter()
+    slow_request_profiler.begin()
+
+
+@admin_bp.teardown_app_request
+def end_request_profile(exc):
+    start = g.get('request_start')
+    if start is not None:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        slow_request_profiler.end(elapsed_ms, f"{request.method} {request.path}")
+
+
+@admin_bp.route('/profile', methods=['GET'])
+@admin_required
+def sample_profile():
+    """Sample all threads for ?seconds=N and return flamegraph collapsed stacks."""
+    seconds = request.args.get('seconds', 10, type=float)
+    interval_ms = request.args.get('interval_ms', 10, type=float)
+    stacks = profiler.profile(seconds, interval_ms)
+    if stacks is None:
+        return jsonify({'error': 'A profile is already running'}), 409
+    return Response(format_collapsed(stacks), mimetype='text/plain')
+
+
+@admin_bp.route('/process', methods=['GET'])
+@admin_required
+def process_status():
+    return jsonify(process_stats())
+
+
+@admin_bp.route('/profile/slow', methods=['GET', 'POST'])
+@admin_required
+def slow_request_profiles():
+    """GET recent slow-request profiles; POST {"threshold_ms": n} to change the threshold (0 disables)."""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            slow_request_profiler.set_threshold(float(data.get('threshold_ms', 0)))
+        except (TypeError, ValueError):
+            return jsonify({'error': "'threshold_ms' must be a number"}), 400
+    return jsonify({
+        'threshold_ms': slow_request_profiler.threshold_ms,
+        'profiles': list(slow_request_profiler.profiles)
+    })
@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# Sampling settings
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+# Requests slower than this get their samples kept; 0 disables per-request profiling
+PROFILE_SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+PROFILE_SLOW_KEEP = int(os.getenv("PROFILE_SLOW_KEEP", "20"))
+MAX_STACK_DEPTH = 128
+
+
+def frame_stack(frame, thread_name=None):
+    """Collapsed-stack string (root first) for a frame, e.g. ``main;handler (app.py:42)``."""
+    parts = []
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    if thread_name:
+        parts.append(thread_name)
+    return ";".join(reversed(parts))
+
+
+def format_collapsed(stacks):
+    """Brendan Gregg collapsed format, one ``stack count`` line per unique stack."""
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval for a bounded time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self):
+        return self._lock.locked()
+
+    def profile(self, seconds, interval_ms=PROFILE_INTERVAL_MS):
+        """Block for ``seconds`` and return a Counter of collapsed stacks.
+
+        Returns None if another profile is already running.
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+            interval = max(interval_ms, 1) / 1000.0
+            own_id = threading.get_ident()
+            stacks = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id != own_id:
+                        stacks[frame_stack(frame, names.get(thread_id, str(thread_id)))] += 1
+                time.sleep(interval)
+            return stacks
+        finally:
+            self._lock.release()
+
+
+class SlowRequestProfiler:
+    """Samples threads serving requests and keeps the profiles of slow ones.
+
+    ``begin()``/``end()`` bracket a request on the serving thread. A
+    background thread samples only those threads, and only while at least
+    one request is in flight.
+    """
+
+    def __init__(self, threshold_ms=PROFILE_SLOW_REQUEST_MS, interval_ms=PROFILE_INTERVAL_MS,
+                 keep=PROFILE_SLOW_KEEP):
+        self.threshold_ms = threshold_ms
+        self.interval = max(interval_ms, 1) / 1000.0
+        self.profiles = deque(maxlen=keep)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sampler = None
+
+    @property
+    def enabled(self):
+        return self.threshold_ms > 0
+
+    def set_threshold(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        if self.enabled:
+            self._start()
+
+    def _start(self):
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._run, name="slow-request-sampler", daemon=True)
+            self._sampler.start()
+
+    def begin(self):
+        if not self.enabled:
+            return
+        self._start()
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+        self._wakeup.set()
+
+    def end(self, elapsed_ms, label):
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+        if stacks is None or not self.enabled or elapsed_ms < self.threshold_ms:
+            return
+        self.profiles.append({
+            "request": label,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "captured_at": time.time(),
+            "samples": sum(stacks.values()),
+            "collapsed": format_collapsed(stacks)
+        })
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                if not self._active:
+                    self._wakeup.clear()
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[frame_stack(frame)] += 1
+            time.sleep(self.interval)
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from onehealth_common import admin
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    app = Flask(__name__)
+    app.register_blueprint(admin.admin_bp)
+
+    @app.route("/slow")
+    def slow():
+        time.sleep(0.1)
+        return "ok"
+
+    yield app.test_client()
+    admin.slow_request_profiler.set_threshold(0)
+    admin.slow_request_profiler.profiles.clear()
+
+
+def test_admin_routes_require_token(client):
+    assert client.get("/api/admin/profile/slow").status_code == 401
+    assert client.get("/api/admin/profile/slow", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+
+def test_profile_returns_collapsed_stacks(client):
+    # The profiler skips its own thread, so give it another one to sample
+    stop = threading.Event()
+    worker = threading.Thread(target=stop.wait, name="worker")
+    worker.start()
+    try:
+        response = client.get("/api/admin/profile?seconds=0.1&interval_ms=5",
+                              headers={"X-Admin-Token": "secret"})
+    finally:
+        stop.set()
+        worker.join()
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    lines = response.get_data(as_text=True).strip().splitlines()
+    assert any(line.startswith("worker;") for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_slow_requests_are_captured_app_wide(client):
+    headers = {"X-Admin-Token": "secret"}
+    response = client.post("/api/admin/profile/slow", json={"threshold_ms": 50}, headers=headers)
+    assert response.get_json()["threshold_ms"] == 50
+
+    client.get("/slow")
+    profiles = client.get("/api/admin/profile/slow", headers=headers).get_json()["profiles"]
+    assert [p["request"] for p in profiles] == ["GET /slow"]
+    assert profiles[0]["elapsed_ms"] >= 50
+
+    assert client.post("/api/admin/profile/slow", json={"threshold_ms": "x"},
+                       headers=headers).status_code == 400
+
+
+def test_process_stats_endpoint(client):
+    assert client.get("/api/admin/process").status_code == 401
+    stats = client.get("/api/admin/process", headers={"X-Admin-Token": "secret"}).get_json()
+    assert stats["peak_rss_mb"] > 0
+    assert stats["python_threads"] >= 1